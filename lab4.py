@@ -1,6 +1,10 @@
+import argparse
+import json
 import requests
 import time
 
+import numpy as np
+
 #список имён, которые будем искать в тексте
 MAIN_CHARACTERS = [
     "Пьер",    
@@ -83,6 +87,90 @@ def kmp_search(text: str, pattern: str):
 
     return occurrences
 
+#поиск через str.find, для сравнения со встроенной реализацией
+def find_search(text: str, pattern: str):
+
+    occurrences = []
+    i = text.find(pattern)
+    while i != -1:
+        occurrences.append(i)
+        i = text.find(pattern, i + 1)
+    return occurrences
+
+#векторизованный поиск на NumPy
+class NumpySearchEngine:
+
+    #текст один раз кодируется в массив кодовых точек (uint8, если все символы < 256, иначе uint32).
+    #кандидаты — позиции, где совпали первый и последний символ паттерна (сравнение по всему массиву сразу),
+    #затем кандидаты проверяются пачкой по остальным символам.
+
+    def __init__(self, text: str):
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+        if codes.size and int(codes.max()) < 256:
+            codes = codes.astype(np.uint8)
+        self.codes = codes
+
+    def search(self, pattern: str):
+
+        #возвращает тот же список индексов, что и naive_search
+
+        plen = len(pattern)
+        tlen = len(self.codes)
+        if plen == 0:
+            return list(range(tlen + 1))
+        if plen > tlen:
+            return []
+
+        pattern_codes = np.frombuffer(pattern.encode('utf-32-le'), dtype='<u4')
+        if int(pattern_codes.max()) > np.iinfo(self.codes.dtype).max:
+            return []  #символа паттерна нет в тексте
+        pattern_codes = pattern_codes.astype(self.codes.dtype)
+
+        last_start = tlen - plen + 1
+        mask = self.codes[:last_start] == pattern_codes[0]
+        mask &= self.codes[plen - 1:] == pattern_codes[-1]
+        candidates = np.flatnonzero(mask)
+
+        for k in range(1, plen - 1):
+            if not candidates.size:
+                break
+            candidates = candidates[self.codes[candidates + k] == pattern_codes[k]]
+
+        return candidates.tolist()
+
+#сравнение движков поиска по каждому имени, время через perf_counter (лучшее из repeats запусков)
+def benchmark_engines(text: str, names, repeats=3):
+
+    start = time.perf_counter()
+    engine = NumpySearchEngine(text)
+    encode_time = time.perf_counter() - start
+
+    engines = {
+        "naive": lambda name: naive_search(text, name),
+        "kmp": lambda name: kmp_search(text, name),
+        "str_find": lambda name: find_search(text, name),
+        "numpy": engine.search,
+    }
+
+    results = {"text_length": len(text), "numpy_encode_seconds": encode_time, "names": {}}
+    for name in names:
+        expected = None
+        row = {}
+        for engine_name, search in engines.items():
+            best = float('inf')
+            for _ in range(repeats):
+                start = time.perf_counter()
+                indices = search(name)
+                best = min(best, time.perf_counter() - start)
+
+            if expected is None:
+                expected = indices
+            elif indices != expected:
+                raise AssertionError(f"движок {engine_name} нашел другие вхождения '{name}'")
+            row[engine_name] = best
+        results["names"][name] = {"occurrences": len(expected), "seconds": row}
+    return results
+
 #основная программа
 def main():
     print("Текст 'Война и мир'...")
@@ -101,9 +189,9 @@ def main():
         print(f"\nИмя '{name}'")
 
         #наивный алгоритм
-        start_naive = time.time()
+        start_naive = time.perf_counter()
         naive_indices = naive_search(text, name)
-        end_naive = time.time()
+        end_naive = time.perf_counter()
 
         naive_search_time = end_naive - start_naive
         naive_time_stats[name] = naive_search_time
@@ -114,9 +202,9 @@ def main():
 
 
         #КМП алгоритм
-        start_kmp = time.time()
+        start_kmp = time.perf_counter()
         kmp_indices = kmp_search(text, name)
-        end_kmp = time.time()
+        end_kmp = time.perf_counter()
 
         kmp_search_time = end_kmp - start_kmp
         kmp_time_stats[name] = kmp_search_time
@@ -140,4 +228,18 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Поиск имен в 'Войне и мире'")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="сравнить наивный, КМП, str.find и NumPy поиск и вывести результат в JSON")
+    parser.add_argument("--file", help="локальный файл с текстом вместо загрузки по URL")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        if args.file:
+            with open(args.file, encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = requests.get(URL).text
+        print(json.dumps(benchmark_engines(text, MAIN_CHARACTERS), ensure_ascii=False, indent=2))
+    else:
+        main()
@@ -1,17 +1,88 @@
+import heapq
 import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from bitarray import bitarray
 from bitarray.util import ba2int, int2ba
 
+class LZ77Stats:
+
+    #статистика сжатия/распаковки вместо печати каждого токена: счетчики токенов, гистограммы длин
+    #и расстояний, время поиска совпадений и записи битов, объем данных на входе и выходе.
+    #on_token(distance, value) вызывается для каждого токена (например, print_token для отладочного вывода)
+
+    def __init__(self, on_token=None):
+        self.on_token = on_token
+        self.literal_count = 0
+        self.match_count = 0
+        self.length_histogram = {}
+        self.distance_histogram = {}
+        self.match_seconds = 0.0  #поиск совпадений
+        self.emit_seconds = 0.0  #запись битов
+        self.decode_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def add_token(self, distance, value):
+        if distance:
+            self.match_count += 1
+            self.length_histogram[value] = self.length_histogram.get(value, 0) + 1
+            self.distance_histogram[distance] = self.distance_histogram.get(distance, 0) + 1
+            self.bytes_in += value
+        else:
+            self.literal_count += 1
+            self.bytes_in += 1
+        if self.on_token is not None:
+            self.on_token(distance, value)
+
+    def to_dict(self):
+        return {
+            "literal_count": self.literal_count,
+            "match_count": self.match_count,
+            "length_histogram": dict(sorted(self.length_histogram.items())),
+            "distance_histogram": dict(sorted(self.distance_histogram.items())),
+            "match_seconds": self.match_seconds,
+            "emit_seconds": self.emit_seconds,
+            "decode_seconds": self.decode_seconds,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+#печать токена в формате (1, distance, length) / (0, символ), колбэк для LZ77Stats
+def print_token(distance, value):
+    if distance:
+        print(f"(1, {distance}, {value}) ", end='')
+    else:
+        print(f"(0, {value}) ", end='')
+
+#разбивает источник на чанки: файловый объект читается по chunk_size байт, иначе источник считается итерируемым набором чанков
+def _iter_chunks(source, chunk_size):
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
 class LZ77Compressor:
     MAX_WINDOW_SIZE = 500  #максимальный размер окна поиска
     MAX_LOOKAHEAD_BUFFER_SIZE = 15  #максимальный размер буфера просмотра
     MAX_MATCH_LENGTH = 15  #максимальная длина совпадения (4 бита)
+    STREAM_CHUNK_SIZE = 64 * 1024  #размер чанка чтения/записи при потоковой обработке
+    DECODE_REFILL_BYTES = 32  #сколько байт за раз подкачивает быстрый декодер в битовый буфер
 
     def __init__(self, window_size=20):
         self.window_size = min(window_size, self.MAX_WINDOW_SIZE)
         self.lookahead_buffer_size = self.MAX_LOOKAHEAD_BUFFER_SIZE
 
-    def compress(self, input_file_path, output_file_path=None, verbose=False):
+    def compress(self, input_file_path, output_file_path=None, verbose=False, stats=None):
         #cжимает данные из входного файла по алгоритму LZ77
 
         try:
@@ -24,46 +95,26 @@ class LZ77Compressor:
             print(f'Ошибка при чтении файла "{input_file_path}": {e}')
             return False
 
-        i = 0
-        output_bits = bitarray(endian='big') #хранение сжатых данных
+        #verbose печатает токены через колбэк статистики только на время этого вызова,
+        #колбэк вызывающего кода при этом тоже вызывается
+        if verbose:
+            if stats is None:
+                stats = LZ77Stats()
+            previous_on_token = stats.on_token
 
-        while i < len(data):
-            match_distance, match_length = self.find_longest_match(data, i)
+            def on_token(distance, value):
+                if previous_on_token is not None:
+                    previous_on_token(distance, value)
+                print_token(distance, value)
 
-            if match_length > 1:
-                #ограничеснная длина совпадения
-                match_length = min(match_length, self.MAX_MATCH_LENGTH)
+            stats.on_token = on_token
 
-                #флаг = 1 при совпадении
-                output_bits.append(1)
-
-                #distance 12 бит
-                distance_bits = int2ba(match_distance, length=12)
-                output_bits.extend(distance_bits)
-
-                #length 4 бита
-                length_bits = int2ba(match_length, length=4)
-                output_bits.extend(length_bits)
-
-                if verbose:
-                    print(f"(1, {match_distance}, {match_length}) ", end='')
-
-                i += match_length
-            else:
-                #флаг = 0 если нет совпадений
-                output_bits.append(0)
-
-                #символ 8 бит
-                symbol_bits = int2ba(data[i], length=8)
-                output_bits.extend(symbol_bits)
-
-                if verbose:
-                    print(f"(0, {data[i]}) ", end='')
-
-                i += 1
-
-        #дополние поток до полного байта 16 бит
-        output_bits.fill()
+        output_bits = bitarray(endian='big') #хранение сжатых данных
+        try:
+            output_bits.frombytes(b''.join(self.iter_compress(self._iter_buffer(data), stats=stats)))
+        finally:
+            if verbose:
+                stats.on_token = previous_on_token
 
         #если сжатый файл меньше исхожного - сохраняем
         if output_file_path:
@@ -86,12 +137,11 @@ class LZ77Compressor:
             return output_bits
         
     #распаковка данных из сжатого файла
-    def decompress(self, input_file_path, output_file_path=None):
+    def decompress(self, input_file_path, output_file_path=None, fast=True):
 
         try:
             with open(input_file_path, 'rb') as f:
-                compressed_bits = bitarray(endian='big')
-                compressed_bits.fromfile(f)
+                compressed_data = f.read()
         except FileNotFoundError:
             print(f'Ошибка: файл "{input_file_path}" не найден.')
             return
@@ -99,6 +149,28 @@ class LZ77Compressor:
             print(f'Ошибка при чтении файла "{input_file_path}": {e}')
             return
 
+        if fast:
+            output_data = bytearray()
+            if self._decode_fast(compressed_data, output_data) is None:
+                print("Ошибка: distance больше текущего размера выходного буфера.")
+        else:
+            compressed_bits = bitarray(endian='big')
+            compressed_bits.frombytes(compressed_data)
+            output_data = self._decode_bits(compressed_bits)
+
+        if output_file_path:
+            try:
+                with open(output_file_path, 'wb') as f:
+                    f.write(output_data)
+                print('Файл успешно распакован и сохранен.')
+            except IOError as e:
+                print(f'Ошибка при записи в файл "{output_file_path}": {e}')
+        else:
+            return bytes(output_data)
+
+    #исходный декодер: поля читаются срезами bitarray, ссылки копируются по одному байту
+    def _decode_bits(self, compressed_bits):
+
         i = 0
         output_data = bytearray() 
 
@@ -120,7 +192,8 @@ class LZ77Compressor:
                 length = ba2int(length_bits)
                 i += 4
 
-                if distance > len(output_data):
+                #distance = 0 кодер не выдает — считаем поток поврежденным
+                if not distance or distance > len(output_data):
                     print("Ошибка: distance больше текущего размера выходного буфера.")
                     break
 
@@ -138,16 +211,245 @@ class LZ77Compressor:
                 output_data.append(symbol)
                 i += 8
 
-        if output_file_path:
-            try:
-                with open(output_file_path, 'wb') as f:
-                    f.write(output_data)
-                print('Файл успешно распакован и сохранен.')
-            except IOError as e:
-                print(f'Ошибка при записи в файл "{output_file_path}": {e}')
-        else:
-            return bytes(output_data)
+        return output_data
+
+    def _decode_fast(self, compressed_data, output_data, state=(0, 0)):
+
+        #быстрый декодер: биты накапливаются в целом числе acc (nbits значащих младших бит),
+        #поля достаются сдвигами и масками, ссылки копируются срезами.
+        #дописывает результат в output_data и возвращает состояние (acc, nbits) для следующего чанка,
+        #или None, если поток поврежден (ошибку сообщает вызывающий код). результат совпадает с _decode_bits.
+
+        acc, nbits = state
+        pos = 0
+        size = len(compressed_data)
+        refill = self.DECODE_REFILL_BYTES
+
+        while True:
+            #подкачка: самый длинный токен занимает 17 бит
+            if nbits < 17 and pos < size:
+                chunk = compressed_data[pos:pos + refill]
+                pos += len(chunk)
+                acc = ((acc & ((1 << nbits) - 1)) << (8 * len(chunk))) | int.from_bytes(chunk, 'big')
+                nbits += 8 * len(chunk)
+
+            if not nbits:
+                break
+
+            if (acc >> (nbits - 1)) & 1:
+                if nbits < 17:
+                    break  #неполный триплет: ждем данные или это дополнение в конце
 
+                nbits -= 17
+                token = acc >> nbits
+                distance = (token >> 4) & 0xFFF
+                length = token & 0xF
+
+                if not distance or distance > len(output_data):
+                    return None
+
+                start = len(output_data) - distance
+                if distance >= length:
+                    #ссылка не перекрывает копируемые байты — копируем срезом
+                    output_data += output_data[start:start + length]
+                else:
+                    #перекрытие: повторяем шаблон из distance байт
+                    pattern = output_data[start:]
+                    output_data += (pattern * (length // distance + 1))[:length]
+            else:
+                if nbits < 9:
+                    break
+
+                nbits -= 9
+                output_data.append((acc >> nbits) & 0xFF)
+
+        return acc & ((1 << nbits) - 1), nbits
+
+
+    #нарезает объект с буферным протоколом на чанки-memoryview без копирования
+    def _iter_buffer(self, data):
+        view = memoryview(data).cast('B')
+        chunk_size = self.STREAM_CHUNK_SIZE
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size]
+
+    def _iter_tokens(self, source, chunk_size=None, stats=None):
+
+        #потоковый поиск совпадений: в памяти только окно поиска и буфер просмотра.
+        #выдает токены (distance, length) для совпадений и (0, символ) для литералов.
+        #в stats.match_seconds учитывается только find_longest_match, без чтения источника.
+
+        chunks = _iter_chunks(source, chunk_size or self.STREAM_CHUNK_SIZE)
+        data = bytearray()  #окно поиска + еще не сжатые данные
+        i = 0
+        eof = False
+
+        while True:
+            #дочитываем данные, пока буфер просмотра не заполнен
+            while not eof and len(data) - i < self.lookahead_buffer_size:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    eof = True
+                else:
+                    data += chunk
+
+            if i >= len(data):
+                break
+
+            if stats is not None:
+                started = time.perf_counter()
+                match_distance, match_length = self.find_longest_match(data, i)
+                stats.match_seconds += time.perf_counter() - started
+            else:
+                match_distance, match_length = self.find_longest_match(data, i)
+
+            if match_length > 1:
+                match_length = min(match_length, self.MAX_MATCH_LENGTH)
+                yield match_distance, match_length
+                i += match_length
+            else:
+                yield 0, data[i]
+                i += 1
+
+            #отбрасываем историю за пределами окна (с запасом, чтобы не сдвигать буфер на каждом шаге)
+            if i > self.window_size + self.STREAM_CHUNK_SIZE:
+                del data[:i - self.window_size]
+                i = self.window_size
+
+    def iter_compress(self, source, chunk_size=None, stats=None):
+
+        #потоковое сжатие с фиксированной шириной полей, выдает готовые байты сжатого потока
+        #по мере накопления. результат совпадает с compress.
+        #stats (LZ77Stats) собирает статистику токенов и время поиска/записи; время, пока генератор
+        #стоит на yield, никуда не засчитывается.
+
+        output_bits = bitarray(endian='big')
+        flush_bits = self.STREAM_CHUNK_SIZE * 8
+        clock = time.perf_counter
+
+        for match_distance, value in self._iter_tokens(source, chunk_size, stats):
+            if stats is not None:
+                started = clock()
+
+            if match_distance:
+                output_bits.append(1)
+                output_bits.extend(int2ba(match_distance, length=12))
+                output_bits.extend(int2ba(value, length=4))
+            else:
+                output_bits.append(0)
+                output_bits.extend(int2ba(value, length=8))
+
+            #сбрасываем полные байты
+            block = None
+            if len(output_bits) >= flush_bits:
+                ready = len(output_bits) // 8 * 8
+                block = output_bits[:ready].tobytes()
+                del output_bits[:ready]
+
+            if stats is not None:
+                stats.emit_seconds += clock() - started
+                stats.add_token(match_distance, value)
+                if block is not None:
+                    stats.bytes_out += len(block)
+
+            if block is not None:
+                yield block
+
+        #дополнение потока до полного байта
+        if stats is not None:
+            started = clock()
+        output_bits.fill()
+        block = output_bits.tobytes()
+        if stats is not None:
+            stats.emit_seconds += clock() - started
+            stats.bytes_out += len(block)
+        if block:
+            yield block
+
+    def compress_bytes(self, data, stats=None):
+
+        #сжимает любой объект с буферным протоколом (bytes, bytearray, memoryview, array, mmap).
+        #вход читается через memoryview чанками, без копирования целиком.
+
+        return b''.join(self.iter_compress(self._iter_buffer(data), stats=stats))
+
+    def decompress_bytes(self, data, stats=None):
+
+        #распаковывает поток с фиксированной шириной полей из любого объекта с буферным протоколом.
+        #поврежденный поток дает ValueError, как и в iter_decompress
+
+        view = memoryview(data).cast('B')
+        started = time.perf_counter()
+        output_data = bytearray()
+        state = self._decode_fast(view, output_data)
+        if stats is not None:
+            stats.decode_seconds += time.perf_counter() - started
+            stats.bytes_in += len(view)
+            stats.bytes_out += len(output_data)
+        if state is None:
+            raise ValueError("Ошибка: distance больше текущего размера выходного буфера.")
+        return bytes(output_data)
+
+    def compress_stream(self, source, destination, chunk_size=None, stats=None):
+
+        #потоково сжимает source (файловый объект или итерируемый набор чанков) в destination.
+        #возвращает количество записанных байт.
+
+        written = 0
+        for block in self.iter_compress(source, chunk_size, stats):
+            destination.write(block)
+            written += len(block)
+        return written
+
+    def iter_decompress(self, source, chunk_size=None, stats=None):
+
+        #потоковая распаковка: хранит только MAX_WINDOW_SIZE байт истории, выдает распакованные байты по мере готовности.
+        #stats получает объем данных и время декодирования (без времени, пока генератор стоит на yield).
+
+        state = (0, 0)  #недочитанные биты между чанками
+        output_data = bytearray()  #история окна + еще не выданные байты
+        flushed = 0  #сколько байт из output_data уже выдано
+        history_size = self.MAX_WINDOW_SIZE
+
+        for chunk in _iter_chunks(source, chunk_size or self.STREAM_CHUNK_SIZE):
+            if stats is not None:
+                started = time.perf_counter()
+            state = self._decode_fast(chunk, output_data, state)
+            if stats is not None:
+                stats.decode_seconds += time.perf_counter() - started
+                stats.bytes_in += len(chunk)
+
+            if state is None:
+                #отдаем все, что успели распаковать, и сообщаем о повреждении потока
+                if len(output_data) > flushed:
+                    if stats is not None:
+                        stats.bytes_out += len(output_data) - flushed
+                    yield bytes(output_data[flushed:])
+                raise ValueError("Ошибка: distance больше текущего размера выходного буфера.")
+
+            if len(output_data) - flushed >= self.STREAM_CHUNK_SIZE:
+                block = bytes(output_data[flushed:])
+                del output_data[:-history_size]
+                flushed = len(output_data)
+                if stats is not None:
+                    stats.bytes_out += len(block)
+                yield block
+
+        #остаток битов меньше токена — это дополнение до байта
+        if len(output_data) > flushed:
+            if stats is not None:
+                stats.bytes_out += len(output_data) - flushed
+            yield bytes(output_data[flushed:])
+
+    def decompress_stream(self, source, destination, chunk_size=None, stats=None):
+
+        #потоково распаковывает source в destination, возвращает количество записанных байт.
+
+        written = 0
+        for block in self.iter_decompress(source, chunk_size, stats):
+            destination.write(block)
+            written += len(block)
+        return written
 
     def find_longest_match(self, data, current_position):
 
@@ -176,6 +478,513 @@ class LZ77Compressor:
 
         return (best_match_distance, best_match_length) if best_match_distance > 0 else (0, 0)
 
+#блочный контейнер: заголовок | блоки (заголовок блока + сжатые данные) | индекс блоков | хвост
+BLOCK_MAGIC = b'LZ7B'
+BLOCK_INDEX_MAGIC = b'LZ7I'
+BLOCK_FORMAT_VERSION = 1
+BLOCK_HEADER = struct.Struct('>4sBBIH')  #magic, версия, флаги, размер блока, размер окна
+BLOCK_ENTRY = struct.Struct('>III')  #длина сжатого блока, длина исходного блока, crc32 исходного блока
+BLOCK_INDEX_ENTRY = struct.Struct('>QIII')  #смещение блока в файле + BLOCK_ENTRY
+BLOCK_TRAILER = struct.Struct('>QI4s')  #смещение индекса, число блоков, magic индекса
+DEFAULT_BLOCK_SIZE = 256 * 1024
+BLOCK_FLAG_HUFFMAN = 0x01  #токены блоков закодированы каноническими кодами Хаффмана
+
+#второй этап в стиле DEFLATE: алфавит литералов/длин (0-255 литералы, 256 + length совпадения)
+#и алфавит кодов расстояний (distance.bit_length(), младшие биты distance пишутся как есть)
+HUFFMAN_LITLEN_SYMBOLS = 256 + LZ77Compressor.MAX_MATCH_LENGTH + 1
+HUFFMAN_DISTANCE_SYMBOLS = 13
+HUFFMAN_MAX_BITS = 12  #ограничение длины кода, задает размер таблицы декодера (4096 элементов)
+
+
+class _BitWriter:
+
+    #запись битов старшим вперед через целочисленный аккумулятор
+
+    def __init__(self):
+        self.output = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, width):
+        self.acc = (self.acc << width) | value
+        self.nbits += width
+        if self.nbits >= 64:
+            ready = self.nbits // 8
+            self.nbits -= ready * 8
+            self.output += (self.acc >> self.nbits).to_bytes(ready, 'big')
+            self.acc &= (1 << self.nbits) - 1
+
+    def getvalue(self):
+        #дополнение нулями до полного байта
+        padding = -self.nbits % 8
+        tail = (self.acc << padding).to_bytes((self.nbits + padding) // 8, 'big')
+        return bytes(self.output + tail)
+
+
+def _huffman_code_lengths(freqs, max_bits=HUFFMAN_MAX_BITS):
+
+    #длины кодов Хаффмана по частотам; если код длиннее max_bits, частоты сглаживаются и дерево строится заново
+
+    lengths = [0] * len(freqs)
+    used = [symbol for symbol, freq in enumerate(freqs) if freq]
+    if len(used) == 1:
+        lengths[used[0]] = 1
+    if len(used) < 2:
+        return lengths
+
+    weights = {symbol: freqs[symbol] for symbol in used}
+    while True:
+        heap = [(weight, symbol, [symbol]) for symbol, weight in weights.items()]
+        heapq.heapify(heap)
+        depth = dict.fromkeys(used, 0)
+        while len(heap) > 1:
+            weight1, order, symbols1 = heapq.heappop(heap)
+            weight2, _, symbols2 = heapq.heappop(heap)
+            for symbol in symbols1 + symbols2:
+                depth[symbol] += 1
+            heapq.heappush(heap, (weight1 + weight2, order, symbols1 + symbols2))
+
+        if max(depth.values()) <= max_bits:
+            for symbol, length in depth.items():
+                lengths[symbol] = length
+            return lengths
+        weights = {symbol: (weight >> 1) | 1 for symbol, weight in weights.items()}
+
+
+def _canonical_codes(lengths):
+
+    #канонические коды: символы упорядочены по (длина, символ), коды идут подряд
+
+    codes = [0] * len(lengths)
+    code = 0
+    previous_length = 0
+    for length, symbol in sorted((length, symbol) for symbol, length in enumerate(lengths) if length):
+        code <<= length - previous_length
+        codes[symbol] = code
+        code += 1
+        previous_length = length
+    return codes
+
+
+def _huffman_decode_table(lengths):
+
+    #таблица на 2**bits элементов: по следующим bits битам потока сразу дает (символ << 4) | длина кода.
+    #-1 отмечает последовательности, которым не соответствует ни один код.
+
+    bits = max(lengths, default=0)
+    table = [-1] * (1 << bits)
+    codes = _canonical_codes(lengths)
+    for symbol, length in enumerate(lengths):
+        if length:
+            span = 1 << (bits - length)
+            start = codes[symbol] << (bits - length)
+            table[start:start + span] = [(symbol << 4) | length] * span
+    return bits, table
+
+
+def _write_code_lengths(writer, lengths):
+    #длины кодов по 4 бита, серии нулей — ниббл 0 и длина серии - 1 (до 16 нулей)
+    i = 0
+    while i < len(lengths):
+        if lengths[i]:
+            writer.write(lengths[i], 4)
+            i += 1
+        else:
+            run = 1
+            while run < 16 and i + run < len(lengths) and not lengths[i + run]:
+                run += 1
+            writer.write(0, 4)
+            writer.write(run - 1, 4)
+            i += run
+
+
+def _read_code_lengths(payload, position, count):
+    #position — номер ниббла в payload; возвращает длины и позицию после таблицы
+    def nibble():
+        nonlocal position
+        if position >= 2 * len(payload):
+            raise ValueError("Ошибка: таблица кодов Хаффмана повреждена.")
+        byte = payload[position >> 1]
+        position += 1
+        return byte & 0xF if position & 1 == 0 else byte >> 4
+
+    lengths = []
+    while len(lengths) < count:
+        length = nibble()
+        if length:
+            lengths.append(length)
+        else:
+            lengths.extend([0] * (nibble() + 1))
+    if len(lengths) != count or max(lengths) > HUFFMAN_MAX_BITS:
+        raise ValueError("Ошибка: таблица кодов Хаффмана повреждена.")
+    return lengths, position
+
+
+def _huffman_encode_tokens(tokens):
+
+    #кодирует токены LZ77 блока: таблицы длин кодов, выравнивание до байта, затем коды токенов
+
+    litlen_freqs = [0] * HUFFMAN_LITLEN_SYMBOLS
+    distance_freqs = [0] * HUFFMAN_DISTANCE_SYMBOLS
+    for distance, value in tokens:
+        if distance:
+            litlen_freqs[256 + value] += 1
+            distance_freqs[distance.bit_length()] += 1
+        else:
+            litlen_freqs[value] += 1
+
+    litlen_lengths = _huffman_code_lengths(litlen_freqs)
+    distance_lengths = _huffman_code_lengths(distance_freqs)
+    litlen_codes = _canonical_codes(litlen_lengths)
+    distance_codes = _canonical_codes(distance_lengths)
+
+    writer = _BitWriter()
+    _write_code_lengths(writer, litlen_lengths)
+    _write_code_lengths(writer, distance_lengths)
+    writer.write(0, -writer.nbits % 8)
+
+    for distance, value in tokens:
+        if distance:
+            symbol = 256 + value
+            writer.write(litlen_codes[symbol], litlen_lengths[symbol])
+            code = distance.bit_length()
+            writer.write(distance_codes[code], distance_lengths[code])
+            if code > 1:
+                writer.write(distance & ((1 << (code - 1)) - 1), code - 1)
+        else:
+            writer.write(litlen_codes[value], litlen_lengths[value])
+    return writer.getvalue()
+
+
+def _huffman_decode(payload, raw_length):
+
+    #табличный декодер блока: raw_length задает, сколько байт нужно восстановить
+
+    litlen_lengths, position = _read_code_lengths(payload, 0, HUFFMAN_LITLEN_SYMBOLS)
+    distance_lengths, position = _read_code_lengths(payload, position, HUFFMAN_DISTANCE_SYMBOLS)
+    pos = (position + 1) // 2  #коды токенов начинаются с границы байта
+
+    litlen_bits, litlen_table = _huffman_decode_table(litlen_lengths)
+    distance_bits, distance_table = _huffman_decode_table(distance_lengths)
+    litlen_mask = (1 << litlen_bits) - 1
+    distance_mask = (1 << distance_bits) - 1
+
+    output_data = bytearray()
+    acc = 0
+    nbits = 0
+    padding = 0  #нулевые биты, дописанные за концом данных, чтобы всегда можно было заглянуть вперед
+
+    while len(output_data) < raw_length:
+        #самый длинный токен: 12 + 12 + 11 бит
+        if nbits < 40:
+            if nbits < padding:
+                raise ValueError("Ошибка: блок Хаффмана обрезан.")
+            chunk = payload[pos:pos + 32]
+            pos += len(chunk)
+            if len(chunk) < 8:
+                padding += 8 * (8 - len(chunk))
+                chunk = chunk + bytes(8 - len(chunk))
+            acc = ((acc & ((1 << nbits) - 1)) << (8 * len(chunk))) | int.from_bytes(chunk, 'big')
+            nbits += 8 * len(chunk)
+
+        entry = litlen_table[(acc >> (nbits - litlen_bits)) & litlen_mask]
+        if entry < 0:
+            raise ValueError("Ошибка: неизвестный код Хаффмана.")
+        nbits -= entry & 0xF
+        symbol = entry >> 4
+
+        if symbol < 256:
+            output_data.append(symbol)
+            continue
+
+        length = symbol - 256
+        entry = distance_table[(acc >> (nbits - distance_bits)) & distance_mask]
+        if entry < 0:
+            raise ValueError("Ошибка: неизвестный код Хаффмана.")
+        nbits -= entry & 0xF
+        code = entry >> 4
+        extra = code - 1
+        if extra > 0:
+            nbits -= extra
+            distance = (1 << extra) | ((acc >> nbits) & ((1 << extra) - 1))
+        else:
+            distance = code
+
+        if not distance or distance > len(output_data):
+            raise ValueError("Ошибка: distance больше текущего размера выходного буфера.")
+        start = len(output_data) - distance
+        if distance >= length:
+            output_data += output_data[start:start + length]
+        else:
+            pattern = output_data[start:]
+            output_data += (pattern * (length // distance + 1))[:length]
+
+    if nbits < padding or len(output_data) != raw_length:
+        raise ValueError("Ошибка: блок Хаффмана обрезан.")
+    return bytes(output_data)
+
+
+#сжатие одного независимого блока, вынесено на уровень модуля для ProcessPoolExecutor
+def _compress_block(window_size, block, flags=0):
+    compressor = LZ77Compressor(window_size=window_size)
+    if flags & BLOCK_FLAG_HUFFMAN:
+        payload = _huffman_encode_tokens(list(compressor._iter_tokens([block])))
+    else:
+        payload = b''.join(compressor.iter_compress([block]))
+    return payload, len(block), zlib.crc32(block)
+
+
+def _decompress_block(payload, raw_length, checksum, flags=0):
+    if flags & BLOCK_FLAG_HUFFMAN:
+        data = _huffman_decode(payload, raw_length)
+    else:
+        data = b''.join(LZ77Compressor().iter_decompress([payload]))
+    if len(data) != raw_length or zlib.crc32(data) != checksum:
+        raise ValueError("Ошибка: контрольная сумма блока не совпадает.")
+    return data
+
+
+def _decompress_block_args(args):
+    return _decompress_block(*args)
+
+
+class LZ77BlockWriter:
+
+    #пишет блочный контейнер: вход режется на блоки block_size байт, блоки сжимаются независимо в пуле процессов.
+    #при workers=1 блоки сжимаются в текущем процессе, как и в LZ77BlockReader.iter_blocks
+
+    def __init__(self, window_size=20, block_size=DEFAULT_BLOCK_SIZE, workers=None, flags=0):
+        if not 0 < block_size < 1 << 32:
+            raise ValueError("Ошибка: размер блока должен быть от 1 байта до 4 ГБ.")
+        self.window_size = min(window_size, LZ77Compressor.MAX_WINDOW_SIZE)
+        self.block_size = block_size
+        self.workers = workers
+        self.flags = flags
+
+    def _write_block(self, destination, index, result):
+        payload, raw_length, checksum = result
+        index.append((destination.tell(), len(payload), raw_length, checksum))
+        destination.write(BLOCK_ENTRY.pack(len(payload), raw_length, checksum))
+        destination.write(payload)
+
+    def write(self, source, destination):
+
+        #source — файловый объект или итерируемый набор блоков, destination — файловый объект с tell().
+        #возвращает число записанных блоков.
+
+        destination.write(BLOCK_HEADER.pack(BLOCK_MAGIC, BLOCK_FORMAT_VERSION, self.flags,
+                                            self.block_size, self.window_size))
+        index = []
+
+        workers = self.workers
+        if workers == 1:
+            for block in self._iter_blocks(source):
+                self._write_block(destination, index, _compress_block(self.window_size, block, self.flags))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                #ограничиваем число блоков в работе, чтобы не держать весь файл в памяти
+                max_pending = 2 * (workers or os.cpu_count() or 1)
+                pending = deque()
+                for block in self._iter_blocks(source):
+                    pending.append(executor.submit(_compress_block, self.window_size, block, self.flags))
+                    if len(pending) >= max_pending:
+                        self._write_block(destination, index, pending.popleft().result())
+                while pending:
+                    self._write_block(destination, index, pending.popleft().result())
+
+        index_offset = destination.tell()
+        for entry in index:
+            destination.write(BLOCK_INDEX_ENTRY.pack(*entry))
+        destination.write(BLOCK_TRAILER.pack(index_offset, len(index), BLOCK_INDEX_MAGIC))
+        return len(index)
+
+    def _iter_blocks(self, source):
+        buffer = bytearray()
+        for chunk in _iter_chunks(source, self.block_size):
+            buffer += chunk
+            while len(buffer) >= self.block_size:
+                yield bytes(buffer[:self.block_size])
+                del buffer[:self.block_size]
+        if buffer:
+            yield bytes(buffer)
+
+
+class LZ77BlockReader:
+
+    #читает блочный контейнер, позволяет распаковать произвольный диапазон без распаковки всего файла
+
+    def __init__(self, input_file_path):
+        self.file = open(input_file_path, 'rb')
+        try:
+            self._read_index()
+        except Exception:
+            self.file.close()
+            raise
+
+    def _read_index(self):
+        header = self.file.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            raise ValueError("Ошибка: файл слишком короткий для блочного контейнера.")
+        magic, version, self.flags, self.block_size, self.window_size = BLOCK_HEADER.unpack(header)
+        if magic != BLOCK_MAGIC:
+            raise ValueError("Ошибка: неверная сигнатура блочного контейнера.")
+        if version != BLOCK_FORMAT_VERSION:
+            raise ValueError(f"Ошибка: неподдерживаемая версия контейнера {version}.")
+        if self.flags & ~BLOCK_FLAG_HUFFMAN:
+            raise ValueError(f"Ошибка: неизвестные флаги контейнера {self.flags:#04x}.")
+        if not self.block_size:
+            raise ValueError("Ошибка: нулевой размер блока в заголовке контейнера.")
+
+        file_size = self.file.seek(0, os.SEEK_END)
+        if file_size < BLOCK_HEADER.size + BLOCK_TRAILER.size:
+            raise ValueError("Ошибка: индекс блоков поврежден.")
+        self.file.seek(-BLOCK_TRAILER.size, os.SEEK_END)
+        index_offset, block_count, index_magic = BLOCK_TRAILER.unpack(self.file.read(BLOCK_TRAILER.size))
+        index_size = block_count * BLOCK_INDEX_ENTRY.size
+        if index_magic != BLOCK_INDEX_MAGIC or index_offset + index_size + BLOCK_TRAILER.size != file_size:
+            raise ValueError("Ошибка: индекс блоков поврежден.")
+
+        self.file.seek(index_offset)
+        raw_index = self.file.read(index_size)
+        self.index = list(BLOCK_INDEX_ENTRY.iter_unpack(raw_index))
+
+        #read_range считает номер блока по block_size, поэтому все блоки, кроме последнего, должны быть полными
+        for number, (offset, compressed_length, raw_length, _) in enumerate(self.index):
+            if number < block_count - 1:
+                valid_length = raw_length == self.block_size
+            else:
+                valid_length = 0 < raw_length <= self.block_size
+            if not valid_length:
+                raise ValueError(f"Ошибка: размер блока {number} не совпадает с размером блока в заголовке.")
+            if offset < BLOCK_HEADER.size or offset + BLOCK_ENTRY.size + compressed_length > index_offset:
+                raise ValueError(f"Ошибка: смещение блока {number} выходит за пределы данных.")
+        self.size = sum(entry[2] for entry in self.index)  #размер исходных данных
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _block_args(self, number):
+        offset, compressed_length, raw_length, checksum = self.index[number]
+        self.file.seek(offset)
+        block = self.file.read(BLOCK_ENTRY.size + compressed_length)
+        #заголовок блока должен совпадать с записью индекса
+        if BLOCK_ENTRY.unpack_from(block) != (compressed_length, raw_length, checksum):
+            raise ValueError(f"Ошибка: заголовок блока {number} не совпадает с индексом.")
+        return block[BLOCK_ENTRY.size:], raw_length, checksum, self.flags
+
+    def read_block(self, number):
+        return _decompress_block(*self._block_args(number))
+
+    def read_range(self, offset, length):
+
+        #распаковывает только блоки, пересекающие диапазон [offset, offset + length)
+
+        if offset < 0 or length < 0:
+            raise ValueError("Ошибка: offset и length должны быть неотрицательными.")
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b''
+
+        first = offset // self.block_size
+        last = (end - 1) // self.block_size
+        data = b''.join(self.read_block(n) for n in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start:start + end - offset]
+
+    def iter_blocks(self, workers=None):
+
+        #распаковывает все блоки по порядку; при workers != 1 блоки распаковываются в пуле процессов
+
+        if workers == 1:
+            for number in range(len(self.index)):
+                yield self.read_block(number)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            max_pending = 2 * (workers or os.cpu_count() or 1)
+            pending = deque()
+            for number in range(len(self.index)):
+                pending.append(executor.submit(_decompress_block_args, self._block_args(number)))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def compress_blocks(input_file_path, output_file_path, window_size=20,
+                    block_size=DEFAULT_BLOCK_SIZE, workers=None, huffman=False):
+
+    #сжимает файл в блочный контейнер, ошибки печатаются и возвращается False, как в LZ77Compressor.compress.
+    #huffman=True включает второй этап (флаг BLOCK_FLAG_HUFFMAN в заголовке)
+
+    try:
+        flags = BLOCK_FLAG_HUFFMAN if huffman else 0
+        writer = LZ77BlockWriter(window_size, block_size, workers, flags)
+    except ValueError as e:
+        print(e)
+        return False
+
+    try:
+        src = open(input_file_path, 'rb')
+    except FileNotFoundError:
+        print(f'Ошибка: файл "{input_file_path}" не найден.')
+        return False
+    except IOError as e:
+        print(f'Ошибка при чтении файла "{input_file_path}": {e}')
+        return False
+
+    with src:
+        try:
+            with open(output_file_path, 'wb') as dst:
+                writer.write(src, dst)
+        except IOError as e:
+            print(f'Ошибка при записи в файл "{output_file_path}": {e}')
+            return False
+    return True
+
+
+def decompress_blocks(input_file_path, output_file_path, workers=None):
+
+    #распаковывает блочный контейнер целиком; поврежденный контейнер (ValueError) тоже дает False
+
+    try:
+        reader = LZ77BlockReader(input_file_path)
+    except FileNotFoundError:
+        print(f'Ошибка: файл "{input_file_path}" не найден.')
+        return False
+    except ValueError as e:
+        print(e)
+        return False
+    except IOError as e:
+        print(f'Ошибка при чтении файла "{input_file_path}": {e}')
+        return False
+
+    with reader:
+        try:
+            dst = open(output_file_path, 'wb')
+        except IOError as e:
+            print(f'Ошибка при записи в файл "{output_file_path}": {e}')
+            return False
+
+        with dst:
+            try:
+                for block in reader.iter_blocks(workers):
+                    dst.write(block)
+            except ValueError as e:
+                print(e)
+                return False
+            except IOError as e:
+                print(f'Ошибка при распаковке "{input_file_path}" в "{output_file_path}": {e}')
+                return False
+    return True
+
+
 if __name__ == "__main__":
     compressor = LZ77Compressor(window_size=300)  # Увеличиваем window_size для лучшего сжатия
 
@@ -185,11 +994,14 @@ if __name__ == "__main__":
 
     # Сжатие
     print(f"Сжатие файла '{input_file}' в '{compressed_file}'...")
+    stats = LZ77Stats()
     was_compressed = compressor.compress(
         input_file_path=input_file,
         output_file_path=compressed_file,
-        verbose=True
+        stats=stats
     )
+    print(f"Токенов: {stats.literal_count} литералов, {stats.match_count} совпадений; "
+          f"поиск совпадений {stats.match_seconds:.2f} сек., запись битов {stats.emit_seconds:.2f} сек.")
 
     if was_compressed:
         print(f"\nРаспаковка файла '{compressed_file}' в '{decompressed_file}'...")
@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from bitarray import bitarray
+
+from lab5 import BLOCK_FLAG_HUFFMAN, LZ77BlockReader, LZ77BlockWriter, LZ77Compressor, LZ77Stats
+
+MB = 1024 * 1024
+
+
+#синтетический текстовый поток заданного размера, генерируется по чанкам и целиком в памяти не хранится
+def synthetic_chunks(total_size, chunk_size=LZ77Compressor.STREAM_CHUNK_SIZE, seed=0):
+    rng = random.Random(seed)
+    words = [w.encode('utf-8') for w in (
+        "Пьер", "Андрей", "Наташа", "Марья", "Николай",
+        "война", "мир", "и", "в", "на", "сказал", "князь", "the", "and",
+    )]
+    produced = 0
+    while produced < total_size:
+        parts = []
+        size = 0
+        while size < chunk_size:
+            word = rng.choice(words)
+            parts.append(word)
+            parts.append(b' ')
+            size += len(word) + 1
+        chunk = b''.join(parts)[:min(chunk_size, total_size - produced)]
+        produced += len(chunk)
+        yield chunk
+
+
+#сжимает и сразу распаковывает поток, меряет пиковую память через tracemalloc и пиковый RSS процесса.
+#tracemalloc замедляет сжатие примерно в 10 раз, поэтому по умолчанию выключен (trace=True включает его,
+#100 МБ с ним идут около получаса); RSS — максимум за всю жизнь процесса, так что размеры стоит передавать по возрастанию.
+def measure_stream_memory(sizes, window_size=300, trace=False):
+    compressor = LZ77Compressor(window_size=window_size)
+    results = []
+
+    for size in sizes:
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+
+        compressed_size = 0
+
+        def compressed():
+            nonlocal compressed_size
+            for block in compressor.iter_compress(synthetic_chunks(size)):
+                compressed_size += len(block)
+                yield block
+
+        restored_size = 0
+        for block in compressor.iter_decompress(compressed()):
+            restored_size += len(block)
+
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        results.append({
+            "input_bytes": size,
+            "compressed_bytes": compressed_size,
+            "restored_bytes": restored_size,
+            "peak_memory_bytes": peak,
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "seconds": elapsed,
+        })
+    return results
+
+
+#масштабирование блочного сжатия по числу процессов и время случайного доступа read_range
+def measure_block_scaling(size, workers_list, block_size=64 * 1024, window_size=300, reads=20):
+    data = b''.join(synthetic_chunks(size))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.lzb")
+        for workers in workers_list:
+            writer = LZ77BlockWriter(window_size=window_size, block_size=block_size, workers=workers)
+            start = time.perf_counter()
+            with open(path, 'wb') as dst:
+                writer.write([data], dst)
+            compress_time = time.perf_counter() - start
+
+            with LZ77BlockReader(path) as reader:
+                start = time.perf_counter()
+                restored = b''.join(reader.iter_blocks(workers))
+                decompress_time = time.perf_counter() - start
+                assert restored == data
+
+                rng = random.Random(workers)
+                start = time.perf_counter()
+                for _ in range(reads):
+                    offset = rng.randrange(len(data))
+                    assert reader.read_range(offset, 100) == data[offset:offset + 100]
+                read_range_time = (time.perf_counter() - start) / reads
+
+            results.append({
+                "workers": workers,
+                "input_bytes": len(data),
+                "compressed_bytes": os.path.getsize(path),
+                "compress_seconds": compress_time,
+                "decompress_seconds": decompress_time,
+                "read_range_seconds": read_range_time,
+            })
+    return results
+
+
+#пропускная способность исходного декодера на bitarray и быстрого декодера, МБ/с по распакованным данным
+def measure_decode_speed(size, window_size=300, repeats=3):
+    compressor = LZ77Compressor(window_size=window_size)
+    data = b''.join(synthetic_chunks(size))
+    compressed = compressor.compress_bytes(data)
+
+    def decode_bits():
+        compressed_bits = bitarray(endian='big')
+        compressed_bits.frombytes(compressed)
+        return compressor._decode_bits(compressed_bits)
+
+    def decode_fast():
+        output_data = bytearray()
+        compressor._decode_fast(compressed, output_data)
+        return output_data
+
+    results = {}
+    for name, decode in (("bitarray", decode_bits), ("fast", decode_fast)):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            restored = decode()
+            best = min(best, time.perf_counter() - start)
+            assert restored == data
+        results[name] = {"seconds": best, "mb_per_second": len(data) / MB / best}
+    return results
+
+
+#степень сжатия и скорость контейнера с фиксированной шириной полей и с этапом Хаффмана
+def measure_huffman(data, block_size=64 * 1024, window_size=300):
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.lzb")
+        for name, flags in (("fixed", 0), ("huffman", BLOCK_FLAG_HUFFMAN)):
+            writer = LZ77BlockWriter(window_size=window_size, block_size=block_size, workers=1, flags=flags)
+            start = time.perf_counter()
+            with open(path, 'wb') as dst:
+                writer.write([data], dst)
+            compress_time = time.perf_counter() - start
+
+            with LZ77BlockReader(path) as reader:
+                start = time.perf_counter()
+                restored = b''.join(reader.iter_blocks(1))
+                decompress_time = time.perf_counter() - start
+            assert restored == data
+
+            compressed_size = os.path.getsize(path)
+            results[name] = {
+                "compressed_bytes": compressed_size,
+                "ssr_percent": (1 - compressed_size / len(data)) * 100,
+                "compress_mb_per_second": len(data) / MB / compress_time,
+                "decompress_mb_per_second": len(data) / MB / decompress_time,
+            }
+    return results
+
+
+#синтетические корпуса для набора бенчмарков
+def synthetic_corpora(size, seed=0):
+    rng = random.Random(seed)
+    return {
+        "random": rng.randbytes(size),
+        "repetitive": (b"abcabcabd" * (size // 9 + 1))[:size],
+        "natural_text": b''.join(synthetic_chunks(size, seed=seed)),
+    }
+
+
+#сжатие/распаковка в памяти по каждому корпусу со статистикой LZ77Stats
+def run_suite(size, window_size=300):
+    compressor = LZ77Compressor(window_size=window_size)
+    report = {"input_bytes": size, "window_size": window_size, "corpora": {}}
+
+    for name, data in synthetic_corpora(size).items():
+        compress_stats = LZ77Stats()
+        start = time.perf_counter()
+        compressed = compressor.compress_bytes(data, stats=compress_stats)
+        compress_time = time.perf_counter() - start
+
+        decompress_stats = LZ77Stats()
+        restored = compressor.decompress_bytes(compressed, stats=decompress_stats)
+        assert restored == data
+
+        report["corpora"][name] = {
+            "compressed_bytes": len(compressed),
+            "ssr_percent": (1 - len(compressed) / len(data)) * 100,
+            "compress_seconds": compress_time,
+            "decompress_seconds": decompress_stats.decode_seconds,
+            "compress_stats": compress_stats.to_dict(),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки LZ77Compressor")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    memory = subparsers.add_parser("memory", help="пиковая память потокового режима")
+    memory.add_argument("--sizes-mb", type=float, nargs="+", default=[10, 100, 1024],
+                        help="размеры входных данных в МБ")
+    memory.add_argument("--trace", action="store_true",
+                        help="дополнительно мерить пик через tracemalloc (примерно в 10 раз медленнее)")
+
+    blocks = subparsers.add_parser("blocks", help="масштабирование блочного контейнера по процессам")
+    blocks.add_argument("--size-mb", type=float, default=8, help="размер входных данных в МБ")
+    blocks.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="числа процессов")
+    blocks.add_argument("--block-kb", type=int, default=64, help="размер блока в КБ")
+
+    decode = subparsers.add_parser("decode", help="скорость декодеров, МБ/с")
+    decode.add_argument("--size-mb", type=float, default=4, help="размер распакованных данных в МБ")
+
+    huffman = subparsers.add_parser("huffman", help="фиксированная ширина полей против этапа Хаффмана")
+    huffman.add_argument("--file", help="входной файл (по умолчанию синтетический текст)")
+    huffman.add_argument("--size-mb", type=float, default=1, help="размер синтетического текста в МБ")
+
+    suite = subparsers.add_parser("suite", help="набор бенчмарков по синтетическим корпусам, вывод в JSON")
+    suite.add_argument("--size-kb", type=int, default=256, help="размер каждого корпуса в КБ")
+    suite.add_argument("--output", help="файл для JSON (по умолчанию stdout)")
+
+    args = parser.parse_args()
+
+    if args.command == "memory":
+        sizes = [int(s * MB) for s in args.sizes_mb]
+        for row in measure_stream_memory(sizes, trace=args.trace):
+            peak = "не измерялся" if row['peak_memory_bytes'] is None else f"{row['peak_memory_bytes'] / 1024:.1f} КБ"
+            print(f"{row['input_bytes'] / MB:.1f} МБ: пик памяти {peak}, "
+                  f"max RSS {row['max_rss_bytes'] / MB:.1f} МБ, "
+                  f"сжато в {row['compressed_bytes']} байт, время {row['seconds']:.2f} сек.")
+    elif args.command == "blocks":
+        rows = measure_block_scaling(int(args.size_mb * MB), args.workers, block_size=args.block_kb * 1024)
+        base = rows[0]["compress_seconds"]
+        for row in rows:
+            print(f"{row['workers']} проц.: сжатие {row['compress_seconds']:.2f} сек. "
+                  f"(ускорение x{base / row['compress_seconds']:.2f}), "
+                  f"распаковка {row['decompress_seconds']:.2f} сек., "
+                  f"read_range {row['read_range_seconds'] * 1000:.2f} мс")
+    elif args.command == "decode":
+        results = measure_decode_speed(int(args.size_mb * MB))
+        for name, row in results.items():
+            print(f"{name}: {row['mb_per_second']:.2f} МБ/с ({row['seconds']:.3f} сек.)")
+        print(f"ускорение x{results['bitarray']['seconds'] / results['fast']['seconds']:.1f}")
+    elif args.command == "huffman":
+        if args.file:
+            with open(args.file, 'rb') as f:
+                data = f.read()
+        else:
+            data = b''.join(synthetic_chunks(int(args.size_mb * MB)))
+        for name, row in measure_huffman(data).items():
+            print(f"{name}: {row['compressed_bytes']} байт, SSR {row['ssr_percent']:.2f}%, "
+                  f"сжатие {row['compress_mb_per_second']:.2f} МБ/с, "
+                  f"распаковка {row['decompress_mb_per_second']:.2f} МБ/с")
+    elif args.command == "suite":
+        report = json.dumps(run_suite(args.size_kb * 1024), ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            print(report)
+
+
+if __name__ == "__main__":
+    main()